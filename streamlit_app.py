@@ -1,27 +1,228 @@
 import streamlit as st
 import pandas as pd
 import json
-from datetime import datetime
+from datetime import datetime, date, timedelta
 import os
+import re
+import bisect
+import threading
+import uuid
+import logging
+import gzip
+import sys
+from array import array
+from enum import IntEnum
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
+# Single data file of deployments from before multi-tournament support
 DATA_FILE = "torneo_data.json"
+TORNEOS_FILE = "torneos.json"
+TORNEOS_DIR = "torneos"
+# Per-tournament caches kept alive at once across sessions
+MAX_TORNEOS_EN_MEMORIA = 4
+BACKUPS_DIR = "backups"
+# A snapshot is taken every BACKUP_CADA saves or BACKUP_INTERVALO seconds, whichever comes first
+BACKUP_CADA = 10
+BACKUP_INTERVALO = 15 * 60
+# Incremental snapshots before the next full one; each full snapshot starts a chain
+BACKUP_COMPLETO_CADA = 20
+MAX_CADENAS_BACKUP = 3
+ADMIN_PASSWORD = "Sebas2014"
 
-def load_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # Ensure new fields exist
-            # Always reset admin session on load
-            data["admin_session"] = None
-            # Ensure teams field exists
-            if "teams" not in data:
-                data["teams"] = []
-            # Ensure players have a 'posicion' field
-            if "jugadores" in data:
-                for j in data["jugadores"]:
-                    if "posicion" not in j:
-                        j["posicion"] = ""
-            return data
+def escribir_json(archivo, contenido):
+    """Write contenido to archivo through a temp file in the same folder.
+
+    The temp file replaces archivo only once fully written, so a cut-off
+    write leaves the previous version in place instead of half a file.
+    """
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(archivo) or ".", prefix=os.path.basename(archivo) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, archivo)
+    except BaseException:
+        os.remove(temporal)
+        raise
+
+def load_torneos():
+    if os.path.exists(TORNEOS_FILE):
+        with open(TORNEOS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    # Deployments from before multi-tournament support have a single data file
+    return {
+        "torneos": [
+            {"slug": "year-10", "nombre": "Year 10 Football Tournament", "archivo": DATA_FILE, "archivado": False}
+        ]
+    }
+
+def save_torneos(registro):
+    escribir_json(TORNEOS_FILE, registro)
+
+def nuevo_slug(registro, nombre):
+    base = re.sub(r"[^a-z0-9]+", "-", nombre.lower()).strip("-") or "torneo"
+    usados = {t["slug"] for t in registro["torneos"]}
+    slug, n = base, 2
+    while slug in usados:
+        slug, n = f"{base}-{n}", n + 1
+    return slug
+
+class Estado(IntEnum):
+    PLAYED = 0
+    PENDING = 1
+
+# Stand-in for a missing score (None in JSON) inside the int columns
+SIN_GOLES = -1
+
+class TablaPartidos:
+    """Matches stored column-wise in typed arrays instead of one dict per match.
+
+    Row i of every column is the same match. Converts to and from the
+    list-of-dicts layout used in the JSON files. Group-stage matches carry
+    their group and knockout matches their round (1 = first round), both
+    tagged with the stage (formato["creado"]) that scheduled them. Rows are
+    indexed by (stage, group) and (stage, round). Any other keys a match
+    has in JSON are kept per row in extras and written back unchanged.
+    """
+
+    __slots__ = ("ids", "equipo1", "equipo2", "goles1", "goles2", "estado", "fechas", "fases", "grupos", "rondas", "extras", "por_grupo", "por_ronda")
+
+    CAMPOS = {"id", "equipo1_id", "equipo2_id", "goles1", "goles2", "fecha", "estado", "fase", "grupo", "ronda"}
+
+    def __init__(self):
+        self.ids = array("i")
+        self.equipo1 = array("i")
+        self.equipo2 = array("i")
+        self.goles1 = array("i")
+        self.goles2 = array("i")
+        self.estado = array("b")
+        self.fechas = []
+        self.fases = []
+        self.grupos = []
+        self.rondas = array("b")
+        self.extras = []
+        self.por_grupo = {}
+        self.por_ronda = {}
+
+    @classmethod
+    def desde_json(cls, partidos):
+        tabla = cls()
+        for idx, p in enumerate(partidos):
+            estado = p.get("estado", "played")
+            extras = {k: v for k, v in p.items() if k not in cls.CAMPOS}
+            if estado not in ("played", "pending"):
+                # Counted as played, but the original value is written back
+                extras["estado"] = estado
+            tabla._anexar(p.get("id", idx + 1), p["equipo1_id"], p["equipo2_id"], p["goles1"], p["goles2"], p["fecha"], estado, p.get("fase"), p.get("grupo"), p.get("ronda", 0), extras or None)
+        return tabla
+
+    def a_json(self):
+        return [self.a_dict(i) for i in range(len(self))]
+
+    def a_dict(self, i):
+        partido = {
+            "id": self.ids[i],
+            "equipo1_id": self.equipo1[i],
+            "equipo2_id": self.equipo2[i],
+            "goles1": None if self.goles1[i] == SIN_GOLES else self.goles1[i],
+            "goles2": None if self.goles2[i] == SIN_GOLES else self.goles2[i],
+            "fecha": self.fechas[i],
+            "estado": Estado(self.estado[i]).name.lower()
+        }
+        if self.fases[i] is not None:
+            partido["fase"] = self.fases[i]
+        if self.grupos[i] is not None:
+            partido["grupo"] = self.grupos[i]
+        if self.rondas[i]:
+            partido["ronda"] = self.rondas[i]
+        if self.extras[i]:
+            partido.update(self.extras[i])
+        return partido
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        # JSON-form dicts, built on demand; hot loops read the columns directly
+        return (self.a_dict(i) for i in range(len(self)))
+
+    def _anexar(self, partido_id, equipo1_id, equipo2_id, goles1, goles2, fecha, estado, fase=None, grupo=None, ronda=0, extras=None):
+        self.ids.append(partido_id)
+        self.equipo1.append(equipo1_id)
+        self.equipo2.append(equipo2_id)
+        self.goles1.append(SIN_GOLES if goles1 is None else goles1)
+        self.goles2.append(SIN_GOLES if goles2 is None else goles2)
+        # Many matches share a date; keep one string per date
+        self.fechas.append(sys.intern(fecha))
+        self.estado.append(Estado.PENDING if estado == "pending" else Estado.PLAYED)
+        self.fases.append(None if fase is None else sys.intern(fase))
+        self.grupos.append(grupo)
+        self.rondas.append(ronda)
+        self.extras.append(extras)
+        if grupo is not None:
+            self.por_grupo.setdefault((fase, grupo), []).append(len(self) - 1)
+        if ronda:
+            self.por_ronda.setdefault((fase, ronda), []).append(len(self) - 1)
+
+    def agregar(self, equipo1_id, equipo2_id, goles1, goles2, fecha, estado="played", fase=None, grupo=None, ronda=0):
+        """Append a match with the next free id and return its row."""
+        self._anexar(max(self.ids, default=0) + 1, equipo1_id, equipo2_id, goles1, goles2, fecha, estado, fase, grupo, ronda)
+        return len(self) - 1
+
+    def registrar_resultado(self, i, goles1, goles2):
+        self.goles1[i] = goles1
+        self.goles2[i] = goles2
+        self.estado[i] = Estado.PLAYED
+        if self.extras[i]:
+            self.extras[i].pop("estado", None)
+
+    def huella(self, filas):
+        """Teams and results in filas as a tuple; changes whenever any of them does."""
+        return tuple((self.ids[i], self.equipo1[i], self.equipo2[i], self.goles1[i], self.goles2[i], self.estado[i]) for i in filas)
+
+    def jugado(self, i):
+        return self.estado[i] == Estado.PLAYED and self.goles1[i] != SIN_GOLES and self.goles2[i] != SIN_GOLES
+
+    def jugados(self, filas=None):
+        """Rows of played matches, optionally restricted to filas and keeping their order."""
+        return [i for i in (range(len(self)) if filas is None else filas) if self.jugado(i)]
+
+    def por_fecha(self, reverse=False):
+        return sorted(range(len(self)), key=self.fechas.__getitem__, reverse=reverse)
+
+def data_json(data):
+    """The data dict in the layout of the JSON files."""
+    return {**{k: v for k, v in data.items() if k != "version_anterior"}, "partidos": data["partidos"].a_json()}
+
+def preparar_data(data):
+    """Fill in missing fields of data read from JSON and build the match table."""
+    # Ensure new fields exist
+    # Always reset admin session on load
+    data["admin_session"] = None
+    # Ensure teams field exists
+    if "teams" not in data:
+        data["teams"] = []
+    if "comments" not in data:
+        data["comments"] = []
+    # Ensure comments have an ID (matches get one in desde_json)
+    for idx, comment in enumerate(data["comments"]):
+        if "id" not in comment:
+            comment["id"] = idx + 1
+    data["partidos"] = TablaPartidos.desde_json(data.get("partidos", []))
+    # Ensure players have a 'posicion' field
+    if "jugadores" in data:
+        for j in data["jugadores"]:
+            if "posicion" not in j:
+                j["posicion"] = ""
+    return data
+
+def load_data(archivo):
+    if os.path.exists(archivo):
+        with open(archivo, 'r', encoding='utf-8') as f:
+            return preparar_data(json.load(f))
     return {
         "equipos": [
             {"id": 1, "nombre": "(10.1 + 10.8)", "escudo": "🦅"},
@@ -32,18 +233,190 @@ def load_data():
             {"id": 6, "nombre": "(10.10)", "escudo": "🐻"},
         ],
         "jugadores": [],
-        "partidos": [],
+        "partidos": TablaPartidos(),
+        "teams": [],
+        "comments": [],
         "admin_session": None
     }
 
-def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def save_data(data, archivo):
+    # A new version per save so per-version caches get rebuilt. Random rather
+    # than a counter: two sessions saving the same data must not end up equal.
+    data["version_anterior"] = data.get("version", 0)
+    data["version"] = uuid.uuid4().hex
+    escribir_json(archivo, data_json(data))
+    obtener_backups(archivo).registrar(data)
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file names: number, timestamp and whether it is full or incremental
+PATRON_SNAPSHOT = re.compile(r"(\d{6,})_(\d{8}T\d{6})_(full|inc)\.json\.gz")
+
+# Entity lists in a backup and the field that identifies each entity
+COLECCIONES_BACKUP = {"equipos": "id", "jugadores": "id", "partidos": "id", "comments": "id", "teams": "predictor"}
+
+class GestorBackups:
+    """Incremental gzip snapshots of one tournament's data, written off the request thread.
+
+    A full snapshot starts a chain; the following ones store only the
+    entities added, changed or removed since the previous snapshot.
+    Restoring replays a chain up to the chosen snapshot. A new manager
+    picks up the newest chain on disk, so restarts do not start a new one.
+    """
+
+    def __init__(self, carpeta):
+        self.carpeta = carpeta
+        self.lock = threading.Lock()
+        self.ejecutor = ThreadPoolExecutor(max_workers=1)
+        self.mutaciones = 0
+        self.ultimo = 0.0
+        # Entities of the last snapshot written: coleccion -> {clave: json}
+        self.estado = None
+        self.en_cadena = 0
+        # (when, message) of the last failed snapshot, until one succeeds
+        self.error = None
+        # Queued first, so no snapshot is taken before the chain is picked up
+        self.ejecutor.submit(self._retomar)
+
+    def _retomar(self):
+        """Load the state of the newest snapshot on disk to carry on its chain."""
+        snapshots = self.listar()
+        if not snapshots:
+            return
+        try:
+            ultima = self._reconstruir(snapshots[-1][0])
+        except (OSError, ValueError, KeyError):
+            logger.warning("Could not read the backups in %s; the next snapshot starts a new chain", self.carpeta, exc_info=True)
+            return
+        estado = self._entidades(ultima)
+        estado["meta"] = {k: v for k, v in ultima.items() if k not in COLECCIONES_BACKUP}
+        inicio = max(i for i, s in enumerate(snapshots) if s[2])
+        self.estado = estado
+        self.en_cadena = len(snapshots) - 1 - inicio
+        with self.lock:
+            self.ultimo = max(self.ultimo, snapshots[-1][1].timestamp())
+
+    def registrar(self, data, forzar=False):
+        """Count a save and queue a snapshot when one is due."""
+        with self.lock:
+            self.mutaciones += 1
+            if not forzar and self.mutaciones < BACKUP_CADA and time.time() - self.ultimo < BACKUP_INTERVALO:
+                return
+            self.mutaciones = 0
+            self.ultimo = time.time()
+        # Copy the lists now; saved entities are replaced rather than edited, and every rerun reloads them
+        copia = {k: list(v) if isinstance(v, list) else v for k, v in data_json(data).items()}
+        self.ejecutor.submit(self._tomar, copia).add_done_callback(self._al_terminar)
+
+    def _al_terminar(self, futuro):
+        error = futuro.exception()
+        if error is None:
+            self.error = None
+            return
+        logger.error("Backup snapshot in %s failed", self.carpeta, exc_info=error)
+        self.error = (datetime.now(), f"{type(error).__name__}: {error}")
+
+    def listar(self):
+        """(numero, timestamp, completo) of each snapshot on disk, oldest first."""
+        if not os.path.isdir(self.carpeta):
+            return []
+        snapshots = []
+        for nombre in os.listdir(self.carpeta):
+            partes = PATRON_SNAPSHOT.fullmatch(nombre)
+            # Ignore anything else that ends up in the folder
+            if partes is None:
+                continue
+            numero, marca, tipo = partes.groups()
+            try:
+                marca = datetime.strptime(marca, "%Y%m%dT%H%M%S")
+            except ValueError:
+                continue
+            snapshots.append((int(numero), marca, tipo == "full"))
+        return sorted(snapshots)
+
+    def _ruta(self, numero, marca, completo):
+        return os.path.join(self.carpeta, f"{numero:06d}_{marca:%Y%m%dT%H%M%S}_{'full' if completo else 'inc'}.json.gz")
+
+    @staticmethod
+    def _entidades(copia):
+        """coleccion -> {clave: json} of the entities in copia."""
+        return {
+            coleccion: {e.get(campo): json.dumps(e, ensure_ascii=False, sort_keys=True) for e in copia.get(coleccion, [])}
+            for coleccion, campo in COLECCIONES_BACKUP.items()
+        }
+
+    def _tomar(self, copia):
+        try:
+            actual = self._entidades(copia)
+            meta = {k: v for k, v in copia.items() if k not in COLECCIONES_BACKUP and k not in ("admin_session", "version")}
+            completo = self.estado is None or self.en_cadena >= BACKUP_COMPLETO_CADA
+            cambios = {}
+            for coleccion, entidades in actual.items():
+                anteriores = {} if completo else self.estado[coleccion]
+                upsert = [json.loads(v) for k, v in entidades.items() if anteriores.get(k) != v]
+                eliminar = [k for k in anteriores if k not in entidades]
+                if upsert or eliminar:
+                    cambios[coleccion] = {"upsert": upsert, "eliminar": eliminar}
+            if not completo and not cambios and meta == self.estado["meta"]:
+                return
+            existentes = self.listar()
+            numero = existentes[-1][0] + 1 if existentes else 1
+            os.makedirs(self.carpeta, exist_ok=True)
+            with gzip.open(self._ruta(numero, datetime.now(), completo), 'wt', encoding='utf-8') as f:
+                json.dump({"meta": meta, "cambios": cambios}, f, ensure_ascii=False)
+            actual["meta"] = meta
+            self.estado = actual
+            self.en_cadena = 0 if completo else self.en_cadena + 1
+            self._podar(existentes + [(numero, None, completo)])
+        except Exception:
+            # Start over with a full snapshot next time
+            self.estado = None
+            raise
+
+    def _podar(self, snapshots):
+        """Drop the oldest chains beyond MAX_CADENAS_BACKUP."""
+        completos = [numero for numero, _, completo in snapshots if completo]
+        if len(completos) <= MAX_CADENAS_BACKUP:
+            return
+        limite = completos[-MAX_CADENAS_BACKUP]
+        for numero, marca, completo in snapshots:
+            if numero < limite:
+                os.remove(self._ruta(numero, marca, completo))
+
+    def restaurar(self, numero):
+        """Data as of snapshot numero, in the layout of the JSON files."""
+        # Run on the backup thread so a snapshot being written or pruned is never read halfway
+        return self.ejecutor.submit(self._reconstruir, numero).result()
+
+    def _reconstruir(self, numero):
+        snapshots = [s for s in self.listar() if s[0] <= numero]
+        inicio = max(i for i, s in enumerate(snapshots) if s[2])
+        colecciones = {coleccion: {} for coleccion in COLECCIONES_BACKUP}
+        meta = {}
+        for snapshot in snapshots[inicio:]:
+            with gzip.open(self._ruta(*snapshot), 'rt', encoding='utf-8') as f:
+                contenido = json.load(f)
+            meta = contenido["meta"]
+            for coleccion, cambios in contenido["cambios"].items():
+                campo = COLECCIONES_BACKUP[coleccion]
+                for clave in cambios["eliminar"]:
+                    colecciones[coleccion].pop(clave, None)
+                for entidad in cambios["upsert"]:
+                    colecciones[coleccion][entidad.get(campo)] = entidad
+        return {**meta, **{coleccion: list(entidades.values()) for coleccion, entidades in colecciones.items()}}
+
+@st.cache_resource(max_entries=MAX_TORNEOS_EN_MEMORIA)
+def obtener_backups(archivo):
+    nombre = os.path.basename(archivo).split(".")[0]
+    return GestorBackups(os.path.join(BACKUPS_DIR, nombre))
 
-def calcular_estadisticas(data):
+def calcular_estadisticas(data, filas=None, equipo_ids=None):
+    """Stats per team over all matches, or only over rows filas for the teams in equipo_ids."""
     stats = {}
     
     for equipo in data["equipos"]:
+        if equipo_ids is not None and equipo["id"] not in equipo_ids:
+            continue
         stats[equipo["id"]] = {
             "nombre": equipo["nombre"],
             "escudo": equipo["escudo"],
@@ -56,15 +429,14 @@ def calcular_estadisticas(data):
             "puntos": 0
         }
     
-    for partido in data["partidos"]:
-        equipo1_id = partido["equipo1_id"]
-        equipo2_id = partido["equipo2_id"]
-        goles1 = partido["goles1"]
-        goles2 = partido["goles2"]
-        estado = partido.get("estado", "played")
-        
+    partidos = data["partidos"]
+    if filas is None:
+        columnas = zip(partidos.equipo1, partidos.equipo2, partidos.goles1, partidos.goles2, partidos.estado)
+    else:
+        columnas = ((partidos.equipo1[i], partidos.equipo2[i], partidos.goles1[i], partidos.goles2[i], partidos.estado[i]) for i in filas)
+    for equipo1_id, equipo2_id, goles1, goles2, estado in columnas:
         # Solo contar partidos jugados en estadísticas
-        if estado == "pending" or goles1 is None or goles2 is None:
+        if estado == Estado.PENDING or goles1 == SIN_GOLES or goles2 == SIN_GOLES:
             continue
         
         stats[equipo1_id]["partidos"] += 1
@@ -91,19 +463,543 @@ def calcular_estadisticas(data):
     
     return stats
 
+def ordenar_estadisticas(stats):
+    """(equipo_id, stat) pairs from best to worst."""
+    return sorted(stats.items(), key=lambda x: (x[1]["puntos"], x[1]["goles_favor"] - x[1]["goles_contra"]), reverse=True)
+
+def filas_tabla(orden):
+    tabla_data = []
+    for i, (equipo_id, stat) in enumerate(orden, 1):
+        tabla_data.append({
+            "Position": f"{i}º" if i <= 3 else str(i),
+            "⚽ Team": f"{stat['escudo']} {stat['nombre']}",
+            "MP": stat["partidos"],
+            "W": stat["ganados"],
+            "D": stat["empatados"],
+            "L": stat["perdidos"],
+            "GF": stat["goles_favor"],
+            "GA": stat["goles_contra"],
+            "GD": stat["goles_favor"] - stat["goles_contra"],
+            "🏅 Pts": stat["puntos"]
+        })
+    return tabla_data
+
+def tabla_posiciones(data):
+    return filas_tabla(ordenar_estadisticas(calcular_estadisticas(data)))
+
+def nombre_grupo(n):
+    return chr(ord("A") + n) if n < 26 else str(n + 1)
+
+def jornadas_round_robin(equipo_ids):
+    """Pairings per matchday so every team meets every other once (circle method)."""
+    ids = list(equipo_ids)
+    if len(ids) % 2:
+        # Whoever is drawn against None rests that matchday
+        ids.append(None)
+    jornadas = []
+    for _ in range(len(ids) - 1):
+        jornadas.append([(ids[i], ids[-1 - i]) for i in range(len(ids) // 2) if ids[i] is not None and ids[-1 - i] is not None])
+        ids = [ids[0], ids[-1]] + ids[1:-1]
+    return jornadas
+
+def crear_fase_grupos(data, grupos, clasifican, inicio):
+    """Set up the group stage and schedule each group's matches, one matchday per week from inicio.
+
+    Returns the rows of the new matches.
+    """
+    data["formato"] = {
+        "tipo": "grupos",
+        "grupos": grupos,
+        "clasifican": clasifican,
+        # Stage id, stored on every match the stage schedules
+        "creado": datetime.now().isoformat(),
+        "eliminatoria": []
+    }
+    filas = []
+    for grupo, equipo_ids in grupos.items():
+        for n, jornada in enumerate(jornadas_round_robin(equipo_ids)):
+            fecha = str(inicio + timedelta(weeks=n))
+            for equipo1_id, equipo2_id in jornada:
+                filas.append(data["partidos"].agregar(equipo1_id, equipo2_id, None, None, fecha, "pending", fase=data["formato"]["creado"], grupo=grupo))
+    return filas
+
+def filas_grupo(data, grupo):
+    """Rows of the current stage's matches in grupo."""
+    return data["partidos"].por_grupo.get((data["formato"]["creado"], grupo), [])
+
+def filas_ronda(data, ronda):
+    """{match id: row} of the current stage's knockout round."""
+    partidos = data["partidos"]
+    return {partidos.ids[i]: i for i in partidos.por_ronda.get((data["formato"]["creado"], ronda), [])}
+
+def clasificacion(data, grupo):
+    return ordenar_estadisticas(calcular_estadisticas(data, filas_grupo(data, grupo), set(data["formato"]["grupos"][grupo])))
+
+@st.cache_data(max_entries=256)
+def clasificacion_grupo(torneo, creado, grupo, huella, _data):
+    """Group standings, recomputed only when the group's matches (huella, hashed by st.cache_data) change."""
+    return clasificacion(_data, grupo)
+
+def sembrar(data):
+    """Qualified (equipo_id, grupo) pairs, group winners first, each position ranked by points and goal difference."""
+    formato = data["formato"]
+    clasificados = []
+    for grupo in formato["grupos"]:
+        for posicion, (equipo_id, stat) in enumerate(clasificacion(data, grupo)[:formato["clasifican"]]):
+            clasificados.append((posicion, -stat["puntos"], stat["goles_contra"] - stat["goles_favor"], -stat["goles_favor"], equipo_id, grupo))
+    return [(c[4], c[5]) for c in sorted(clasificados)]
+
+def cuadro_inicial(clasificados):
+    """First-round pairs of a bracket with the best seeds as far apart as possible.
+
+    Seeds beyond the number of qualifiers are byes (None). Teams from the
+    same group are kept apart in the first round where a swap allows it.
+    """
+    tamano = 1
+    while tamano < len(clasificados):
+        tamano *= 2
+    orden = [1]
+    while len(orden) < tamano:
+        orden = [x for semilla in orden for x in (semilla, 2 * len(orden) + 1 - semilla)]
+    equipos = [clasificados[s - 1] if s <= len(clasificados) else (None, None) for s in orden]
+    pares = [[equipos[i], equipos[i + 1]] for i in range(0, tamano, 2)]
+    for i, par in enumerate(pares):
+        if par[1][0] is None or par[0][1] != par[1][1]:
+            continue
+        for otro in pares[i + 1:]:
+            if otro[1][0] is not None and otro[1][1] != par[0][1] and otro[0][1] != par[1][1]:
+                par[1], otro[1] = otro[1], par[1]
+                break
+    return [(a[0], b[0]) for a, b in pares]
+
+def ganador_par(partidos, par, filas):
+    """Winner of a bracket pair, or None while its match is not decided."""
+    if par["equipo2_id"] is None:
+        return par["equipo1_id"]
+    fila = filas[par["partido_id"]]
+    if not partidos.jugado(fila) or partidos.goles1[fila] == partidos.goles2[fila]:
+        return None
+    return partidos.equipo1[fila] if partidos.goles1[fila] > partidos.goles2[fila] else partidos.equipo2[fila]
+
+def avanzar_fase(data):
+    """Draw the next knockout round once the group stage or the current round is complete.
+
+    Returns the rows of the new matches.
+    """
+    formato = data["formato"]
+    partidos = data["partidos"]
+    eliminatoria = formato["eliminatoria"]
+    if not eliminatoria:
+        filas = [i for grupo in formato["grupos"] for i in filas_grupo(data, grupo)]
+        if not filas or len(partidos.jugados(filas)) < len(filas):
+            return []
+        pares = cuadro_inicial(sembrar(data))
+    else:
+        if len(eliminatoria[-1]) == 1:
+            return []
+        filas = filas_ronda(data, len(eliminatoria))
+        ganadores = [ganador_par(partidos, par, filas) for par in eliminatoria[-1]]
+        if None in ganadores:
+            return []
+        pares = [(ganadores[i], ganadores[i + 1]) for i in range(0, len(ganadores), 2)]
+    ronda = len(eliminatoria) + 1
+    nuevas = []
+    cuadro = []
+    for equipo1_id, equipo2_id in pares:
+        par = {"equipo1_id": equipo1_id, "equipo2_id": equipo2_id, "partido_id": None}
+        if equipo2_id is not None:
+            fila = partidos.agregar(equipo1_id, equipo2_id, None, None, str(date.today()), "pending", fase=formato["creado"], ronda=ronda)
+            par["partido_id"] = partidos.ids[fila]
+            nuevas.append(fila)
+        cuadro.append(par)
+    eliminatoria.append(cuadro)
+    return nuevas
+
+def cambio_en_partido(data, fila):
+    """Advance the bracket if a result of the current stage completed a round.
+
+    Returns the rows of any knockout matches created.
+    """
+    formato = data.get("formato")
+    if not formato or data["partidos"].fases[fila] != formato["creado"]:
+        return []
+    return avanzar_fase(data)
+
+def nombre_ronda(pares):
+    if pares == 1:
+        return "🏆 Final"
+    if pares == 2:
+        return "Semi-finals"
+    if pares == 4:
+        return "Quarter-finals"
+    return f"Round of {pares * 2}"
+
+def etiqueta_fase(data, fila):
+    """Group or knockout round of a match, for captions."""
+    partidos = data["partidos"]
+    if partidos.grupos[fila] is not None:
+        return f"Group {partidos.grupos[fila]}"
+    if partidos.rondas[fila]:
+        formato = data.get("formato")
+        if formato and partidos.fases[fila] == formato["creado"]:
+            return nombre_ronda(len(formato["eliminatoria"][partidos.rondas[fila] - 1]))
+        # Left over from a group stage that was removed
+        return f"Knockout round {partidos.rondas[fila]}"
+    return ""
+
+def resumen_eliminatoria(data):
+    """Bracket rounds as display labels and scores, plus the champion's name once the final is decided."""
+    formato = data["formato"]
+    partidos = data["partidos"]
+    escudos = {e["id"]: f"{e['escudo']} {e['nombre']}" for e in data["equipos"]}
+    rondas = []
+    for ronda, cuadro in enumerate(formato["eliminatoria"], 1):
+        filas = filas_ronda(data, ronda)
+        pares = []
+        for par in cuadro:
+            resumen = {"equipo1": escudos.get(par["equipo1_id"], "⚽ Unknown Team"), "equipo2": None, "goles1": "?", "goles2": "?"}
+            if par["equipo2_id"] is not None:
+                resumen["equipo2"] = escudos.get(par["equipo2_id"], "⚽ Unknown Team")
+                fila = filas[par["partido_id"]]
+                if partidos.jugado(fila):
+                    resumen["goles1"], resumen["goles2"] = partidos.goles1[fila], partidos.goles2[fila]
+            pares.append(resumen)
+        rondas.append({"nombre": nombre_ronda(len(cuadro)), "pares": pares})
+    campeon = None
+    eliminatoria = formato["eliminatoria"]
+    if eliminatoria and len(eliminatoria[-1]) == 1:
+        ganador = ganador_par(partidos, eliminatoria[-1][0], filas_ronda(data, len(eliminatoria)))
+        if ganador is not None:
+            campeon = obtener_nombre_equipo(data, ganador)
+    return rondas, campeon
+
+def mostrar_eliminatoria(rondas, campeon):
+    cols = st.columns(len(rondas))
+    for col, ronda in zip(cols, rondas):
+        with col:
+            st.markdown(f"**{ronda['nombre']}**")
+            for par in ronda["pares"]:
+                with st.container(border=True):
+                    if par["equipo2"] is None:
+                        st.markdown(par["equipo1"])
+                        st.caption("Bye")
+                    else:
+                        st.markdown(f"{par['equipo1']} **{par['goles1']}**  \n{par['equipo2']} **{par['goles2']}**")
+    if campeon is not None:
+        st.success(f"🏆 CHAMPION: {campeon}")
+
+def archivar_torneo(registro, torneo, data):
+    """Write a finished season as read-only gzip JSON with its final standings.
+
+    The archive is read back before the live file is set aside as *.bak;
+    raises ValueError if it does not match what was written.
+    """
+    archivo = os.path.join(TORNEOS_DIR, f"{torneo['slug']}.json.gz")
+    os.makedirs(TORNEOS_DIR, exist_ok=True)
+    archivo_data = {k: v for k, v in data_json(data).items() if k not in ("admin_session", "version")}
+    archivo_data["nombre"] = torneo["nombre"]
+    archivo_data["archivado"] = datetime.now().isoformat()
+    formato = data.get("formato")
+    if formato:
+        archivo_data["grupos_final"] = {grupo: filas_tabla(clasificacion(data, grupo)) for grupo in formato["grupos"]}
+        archivo_data["eliminatoria_final"], archivo_data["campeon"] = resumen_eliminatoria(data)
+    else:
+        archivo_data["clasificacion_final"] = tabla_posiciones(data)
+    with gzip.open(archivo, 'wt', encoding='utf-8') as f:
+        json.dump(archivo_data, f, ensure_ascii=False)
+    try:
+        with gzip.open(archivo, 'rt', encoding='utf-8') as f:
+            leido = json.load(f)
+    except (OSError, ValueError):
+        leido = None
+    if leido != archivo_data:
+        os.remove(archivo)
+        raise ValueError(f"Archive {archivo} could not be read back")
+    anterior = torneo["archivo"]
+    torneo["archivo"] = archivo
+    torneo["archivado"] = True
+    save_torneos(registro)
+    # Keep the live file around instead of deleting it
+    os.replace(anterior, anterior + ".bak")
+
+@st.cache_data(max_entries=2)
+def load_archivo(archivo):
+    with gzip.open(archivo, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
 def obtener_nombre_equipo(data, equipo_id):
     for equipo in data["equipos"]:
         if equipo["id"] == equipo_id:
             return equipo["nombre"]
     return "Unknown Team"
 
+POSICIONES_EQUIPO = ["GK", "CB", "CM", "ST", "LW/RW"]
+# Player positions that fill one of the team slots under another name
+POSICIONES_EQUIVALENTES = {"MC": "CM", "CAM": "CM"}
+# Max players offered per selectbox; the search box narrows the rest
+LIMITE_OPCIONES = 50
+
+@st.cache_resource(max_entries=MAX_TORNEOS_EN_MEMORIA)
+def indice_posiciones(torneo, version, _jugadores):
+    """Player ids per team slot, display labels and lowercase names, built once per data version.
+
+    Shared between sessions without copying, so callers must not modify it.
+    """
+    por_posicion = {pos: [] for pos in POSICIONES_EQUIPO}
+    etiquetas = {}
+    nombres = {}
+    for p in _jugadores:
+        etiquetas[p["id"]] = f"{p.get('nombre', 'Unknown')} (#{p.get('numero', '')})"
+        nombres[p["id"]] = p.get("nombre", "").lower()
+        posicion = POSICIONES_EQUIVALENTES.get(p.get("posicion", ""), p.get("posicion", ""))
+        # Players without a known position can play anywhere
+        for pos in [posicion] if posicion in por_posicion else POSICIONES_EQUIPO:
+            por_posicion[pos].append(p["id"])
+    for ids in por_posicion.values():
+        ids.sort(key=lambda i: nombres[i])
+    return por_posicion, etiquetas, nombres
+
+def filtrar_opciones(ids, nombres, texto, seleccionado):
+    """Options for a slot: players whose name has a word starting with texto, plus the current pick."""
+    texto = texto.strip().lower()
+    if texto:
+        ids = [i for i in ids if nombres[i].startswith(texto) or f" {texto}" in nombres[i]]
+    opciones = ids[:LIMITE_OPCIONES]
+    if seleccionado != "" and seleccionado not in opciones:
+        opciones = [seleccionado] + opciones
+    return [""] + opciones
+
+@st.cache_resource(max_entries=MAX_TORNEOS_EN_MEMORIA)
+def indice_teams(torneo, version, _teams):
+    """Position of each predictor's team in data["teams"], built once per data version (read-only)."""
+    return {t.get("predictor"): idx for idx, t in enumerate(_teams)}
+
+LIMITE_BUSQUEDA = 20
+
+def tokenizar(texto, partes=False):
+    """Lowercase words of texto; dotted names such as 10.1 stay whole.
+
+    With partes, the pieces of each dotted word are added too, so 10.1
+    is also found by searching 10 or 1.
+    """
+    palabras = set(re.findall(r"\w+(?:\.\w+)*", str(texto).lower()))
+    if partes:
+        for palabra in [p for p in palabras if "." in p]:
+            palabras.update(palabra.split("."))
+    return palabras
+
+def documento_busqueda(data, tipo, entidad):
+    """Searchable text and display label for a player, team, match or comment.
+
+    Matches are given by their row in data["partidos"].
+    """
+    if tipo == "jugador":
+        equipo = obtener_nombre_equipo(data, entidad.get("equipo_id"))
+        texto = f"{entidad.get('nombre', '')} {entidad.get('posicion', '')}"
+        return texto, f"👤 {entidad.get('nombre', '')} ({entidad.get('posicion', '')}) · {equipo}"
+    if tipo == "equipo":
+        return entidad["nombre"], f"{entidad.get('escudo', '')} {entidad['nombre']}"
+    if tipo == "partido":
+        partidos = data["partidos"]
+        equipo1 = obtener_nombre_equipo(data, partidos.equipo1[entidad])
+        equipo2 = obtener_nombre_equipo(data, partidos.equipo2[entidad])
+        fecha = partidos.fechas[entidad]
+        texto = f"{fecha} {equipo1} {equipo2}"
+        if not partidos.jugado(entidad):
+            marcador = "? - ?"
+        else:
+            marcador = f"{partidos.goles1[entidad]} - {partidos.goles2[entidad]}"
+        return texto, f"📅 {fecha}: {equipo1} {marcador} {equipo2}"
+    mensaje = entidad.get("message", "")
+    resumen = mensaje if len(mensaje) <= 60 else mensaje[:60] + "..."
+    return f"{entidad.get('name', '')} {mensaje}", f"💬 {entidad.get('name', '')}: {resumen}"
+
+class IndiceBusqueda:
+    """Inverted index with prefix matching, updated on each mutation instead of rebuilt."""
+
+    def __init__(self):
+        self.version = None
+        self.lock = threading.Lock()
+        self.postings = {}  # token -> set of (tipo, id)
+        self.tokens = []    # sorted vocabulary, for prefix ranges
+        self.docs = {}      # (tipo, id) -> (tokens, label)
+
+    def reconstruir(self, data):
+        self.postings, self.tokens, self.docs = {}, [], {}
+        colecciones = [("equipo", "equipos"), ("jugador", "jugadores"), ("comentario", "comments")]
+        for tipo, coleccion in colecciones:
+            for entidad in data.get(coleccion, []):
+                self._indexar(data, tipo, entidad, ordenar=False)
+        # Matches straight from the columns, by row
+        for fila in range(len(data["partidos"])):
+            self._indexar(data, "partido", fila, ordenar=False)
+        # Sorting once is far cheaper than inserting every new word in order
+        self.tokens = sorted(self.postings)
+        self.version = data.get("version", 0)
+
+    def _indexar(self, data, tipo, entidad, ordenar=True):
+        clave = (tipo, data["partidos"].ids[entidad] if tipo == "partido" else entidad["id"])
+        self._quitar(clave)
+        texto, etiqueta = documento_busqueda(data, tipo, entidad)
+        tokens = tokenizar(texto, partes=True)
+        for token in tokens:
+            if token not in self.postings:
+                self.postings[token] = set()
+                if ordenar:
+                    bisect.insort(self.tokens, token)
+            self.postings[token].add(clave)
+        self.docs[clave] = (tokens, etiqueta)
+
+    def _quitar(self, clave):
+        doc = self.docs.pop(clave, None)
+        if doc is None:
+            return
+        for token in doc[0]:
+            claves = self.postings[token]
+            claves.discard(clave)
+            if not claves:
+                del self.postings[token]
+                del self.tokens[bisect.bisect_left(self.tokens, token)]
+
+    def _con_prefijo(self, prefijo):
+        inicio = bisect.bisect_left(self.tokens, prefijo)
+        fin = bisect.bisect_left(self.tokens, prefijo + "\U0010ffff")
+        return self.tokens[inicio:fin]
+
+    def sincronizar(self, data):
+        with self.lock:
+            if self.version != data.get("version", 0):
+                self.reconstruir(data)
+
+    def actualizar(self, data, tipo=None, *entidades, id_eliminado=None):
+        """Apply one mutation, already persisted with save_data, to the index.
+
+        Matches are given by row. Without a tipo the save touched nothing
+        searchable and only the version moves.
+        """
+        with self.lock:
+            # Another session saved in between: fall back to a rebuild on the next sync
+            if self.version != data.get("version_anterior"):
+                return
+            for entidad in entidades:
+                self._indexar(data, tipo, entidad)
+            if id_eliminado is not None:
+                self._quitar((tipo, id_eliminado))
+            self.version = data.get("version", 0)
+
+    def buscar(self, consulta, limite=LIMITE_BUSQUEDA):
+        """Labels of documents where every query word prefixes some indexed word."""
+        prefijos = tokenizar(consulta)
+        if not prefijos:
+            return []
+        with self.lock:
+            rangos = {p: self._con_prefijo(p) for p in prefijos}
+            # Walk the most selective prefix and check the others per document
+            guia = min(prefijos, key=lambda p: sum(len(self.postings[t]) for t in rangos[p]))
+            resto = [p for p in prefijos if p != guia]
+            resultados = []
+            vistos = set()
+            for token in rangos[guia]:
+                for clave in self.postings[token]:
+                    if clave in vistos:
+                        continue
+                    vistos.add(clave)
+                    tokens, etiqueta = self.docs[clave]
+                    if all(any(t.startswith(p) for t in tokens) for p in resto):
+                        resultados.append(etiqueta)
+                        if len(resultados) >= limite:
+                            return resultados
+            return resultados
+
+@st.cache_resource(max_entries=MAX_TORNEOS_EN_MEMORIA)
+def obtener_indice(torneo):
+    return IndiceBusqueda()
+
 # Prediction scoring removed — predictions subsystem deprecated
 
-data = load_data()
+registro = load_torneos()
+torneos_por_slug = {t["slug"]: t for t in registro["torneos"]}
+
+st.sidebar.markdown("### 🏟️ TOURNAMENT")
+if "torneo_pendiente" in st.session_state:
+    st.session_state.torneo = st.session_state.pop("torneo_pendiente")
+torneo_slug = st.sidebar.selectbox(
+    "Tournament",
+    options=list(torneos_por_slug),
+    format_func=lambda x: f"{torneos_por_slug[x]['nombre']}{' 🗄️' if torneos_por_slug[x]['archivado'] else ''}",
+    key="torneo"
+)
+torneo = torneos_por_slug[torneo_slug]
+
+st.markdown(f"<div class='title-big'>⚽ {torneo['nombre'].upper()} ⚽</div>", unsafe_allow_html=True)
+
+if torneo["archivado"]:
+    # Finished seasons are read-only and never touch the live data file
+    archivo_data = load_archivo(torneo["archivo"])
+    st.markdown(f"<p style='text-align: center; font-size: 1.2rem; color: #666;'>🗄️ Archived season · {archivo_data['archivado'][:10]}</p>", unsafe_allow_html=True)
+    st.markdown("---")
+    st.header("🏆 FINAL STANDINGS")
+    if "grupos_final" in archivo_data:
+        cols = st.columns(2)
+        for idx, (grupo, tabla_grupo) in enumerate(archivo_data["grupos_final"].items()):
+            with cols[idx % 2]:
+                st.subheader(f"Group {grupo}")
+                st.dataframe(pd.DataFrame(tabla_grupo), use_container_width=True, hide_index=True)
+        st.subheader("🏆 Knockout Stage")
+        if archivo_data["eliminatoria_final"]:
+            mostrar_eliminatoria(archivo_data["eliminatoria_final"], archivo_data["campeon"])
+        else:
+            st.info("The knockout stage was not played.")
+    else:
+        st.dataframe(pd.DataFrame(archivo_data["clasificacion_final"]), use_container_width=True, hide_index=True)
+    with st.expander(f"📋 Matches ({len(archivo_data['partidos'])})"):
+        partidos = TablaPartidos.desde_json(archivo_data["partidos"])
+        for fila in partidos.por_fecha():
+            equipo1_nombre = obtener_nombre_equipo(archivo_data, partidos.equipo1[fila])
+            equipo2_nombre = obtener_nombre_equipo(archivo_data, partidos.equipo2[fila])
+            if not partidos.jugado(fila):
+                score_display = "? - ?"
+            else:
+                score_display = f"{partidos.goles1[fila]} - {partidos.goles2[fila]}"
+            st.markdown(f"📅 {partidos.fechas[fila]}: {equipo1_nombre} **{score_display}** {equipo2_nombre}")
+    st.markdown("---")
+    st.markdown(f"<p style='text-align: center; color: #999; font-size: 0.8rem;'>⚽ {torneo['nombre']} v1.0 - May the best team win! 🏆</p>", unsafe_allow_html=True)
+    st.stop()
+
+archivo_torneo = torneo["archivo"]
+try:
+    data = load_data(archivo_torneo)
+except ValueError as e:
+    # Unreadable data file (e.g. a write cut off before saves were atomic):
+    # offer the latest snapshot here, since the Admin panel needs the data
+    backups = obtener_backups(archivo_torneo)
+    snapshots = backups.listar()
+    st.error(f"❌ The data file {archivo_torneo} could not be read: {e}")
+    if not snapshots:
+        st.info("No snapshots to restore from. Fix or replace the file by hand.")
+        st.stop()
+    numero_backup, marca_backup, _ = snapshots[-1]
+    st.info(f"📌 The latest snapshot is #{numero_backup} from {marca_backup:%Y-%m-%d %H:%M:%S}. An admin can restore it; the unreadable file is kept as {archivo_torneo}.corrupt")
+    password_input = st.text_input("Enter admin password", type="password", placeholder="Enter password")
+    if st.button("⏪ Restore Latest Snapshot", type="primary"):
+        if password_input != ADMIN_PASSWORD:
+            st.error("❌ Incorrect password")
+        else:
+            try:
+                restaurada = preparar_data(backups.restaurar(numero_backup))
+                os.replace(archivo_torneo, archivo_torneo + ".corrupt")
+            except (OSError, ValueError) as e:
+                st.error(f"❌ Could not restore snapshot #{numero_backup}: {e}")
+            else:
+                save_data(restaurada, archivo_torneo)
+                st.success(f"✅ Data restored to snapshot #{numero_backup}")
+                st.rerun()
+    st.stop()
+indice = obtener_indice(torneo_slug)
+indice.sincronizar(data)
 
 # (Prediction registration removed)
 
-st.markdown("<div class='title-big'>⚽ YEAR 10 FOOTBALL TOURNAMENT ⚽</div>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; font-size: 1.2rem; color: #666;'>🔥 Let the battle begin! 🔥</p>", unsafe_allow_html=True)
 
 # Predictor Registration Section
@@ -120,45 +1016,55 @@ opcion = st.sidebar.radio(
     key="menu"
 )
 
+st.sidebar.markdown("---")
+consulta = st.sidebar.text_input("🔎 Search", placeholder="Players, teams, matches, comments...", key="busqueda")
+if consulta.strip():
+    resultados = indice.buscar(consulta)
+    if not resultados:
+        st.sidebar.caption("No results")
+    for etiqueta in resultados:
+        st.sidebar.markdown(f"- {etiqueta}")
+
 if opcion == "📊 Standings":
     st.header("📊 STANDINGS")
     
-    stats = calcular_estadisticas(data)
-    
-    tabla_data = []
-    for equipo_id, stat in stats.items():
-        tabla_data.append({
-            "Position": 0,
-            "⚽ Team": f"{stat['escudo']} {stat['nombre']}",
-            "MP": stat["partidos"],
-            "W": stat["ganados"],
-            "D": stat["empatados"],
-            "L": stat["perdidos"],
-            "GF": stat["goles_favor"],
-            "GA": stat["goles_contra"],
-            "GD": stat["goles_favor"] - stat["goles_contra"],
-            "🏅 Pts": stat["puntos"]
-        })
-    
-    tabla_data.sort(key=lambda x: (x["🏅 Pts"], x["GD"]), reverse=True)
-    
-    for i, row in enumerate(tabla_data, 1):
-        row["Position"] = f"{i}º" if i <= 3 else str(i)
-    
-    df_tabla = pd.DataFrame(tabla_data)
-    
-    st.dataframe(
-        df_tabla,
-        use_container_width=True,
-        hide_index=True
-    )
+    formato = data.get("formato")
+    if formato:
+        cols = st.columns(2)
+        for idx, grupo in enumerate(formato["grupos"]):
+            with cols[idx % 2]:
+                st.subheader(f"Group {grupo}")
+                huella = data["partidos"].huella(filas_grupo(data, grupo))
+                orden = clasificacion_grupo(torneo_slug, formato["creado"], grupo, huella, data)
+                st.dataframe(pd.DataFrame(filas_tabla(orden)), use_container_width=True, hide_index=True)
+        st.caption(f"🎟️ The top {formato['clasifican']} of each group advance to the knockout stage")
+        
+        st.markdown("---")
+        st.subheader("🏆 Knockout Stage")
+        
+        eliminatoria = formato["eliminatoria"]
+        if not eliminatoria:
+            st.info("⏳ The bracket is drawn when every group match has been played.")
+        else:
+            mostrar_eliminatoria(*resumen_eliminatoria(data))
+    else:
+        tabla_data = tabla_posiciones(data)
+        
+        df_tabla = pd.DataFrame(tabla_data)
+        
+        st.dataframe(
+            df_tabla,
+            use_container_width=True,
+            hide_index=True
+        )
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        partidos_jugados = [p for p in data["partidos"] if p.get("estado", "played") == "played" and p["goles1"] is not None and p["goles2"] is not None]
+        partidos = data["partidos"]
+        partidos_jugados = partidos.jugados()
         st.metric("⚽ Matches Played", len(partidos_jugados))
     with col2:
-        total_goles = sum(p["goles1"] + p["goles2"] for p in partidos_jugados)
+        total_goles = sum(partidos.goles1[i] + partidos.goles2[i] for i in partidos_jugados)
         st.metric("🎯 Total Goals", total_goles)
     with col3:
         st.metric("🏆 Participating Teams", len(data["equipos"]))
@@ -187,12 +1093,14 @@ elif opcion == "🏆 Teams":
             if st.button("✅ Save"):
                 if nombre_equipo:
                     nuevo_id = max([e["id"] for e in data["equipos"]], default=0) + 1
-                    data["equipos"].append({
+                    nuevo_equipo = {
                         "id": nuevo_id,
                         "nombre": nombre_equipo,
                         "escudo": escudo
-                    })
-                    save_data(data)
+                    }
+                    data["equipos"].append(nuevo_equipo)
+                    save_data(data, archivo_torneo)
+                    indice.actualizar(data, "equipo", nuevo_equipo)
                     st.success(f"✅ Team {escudo} {nombre_equipo} added")
                     st.session_state.show_form = False
                     st.rerun()
@@ -261,7 +1169,8 @@ elif opcion == "👥 Players":
                         with col4:
                             if st.button("❌ Delete", key=f"delete_{jugador['id']}", use_container_width=True):
                                 data["jugadores"].remove(jugador)
-                                save_data(data)
+                                save_data(data, archivo_torneo)
+                                indice.actualizar(data, "jugador", id_eliminado=jugador["id"])
                                 st.success("Player deleted")
                                 st.rerun()
 
@@ -280,17 +1189,19 @@ elif opcion == "Make your team":
 
         # Support both English and Spanish keys: 'players' or 'jugadores'
         jugadores = data.get("players", data.get("jugadores", []))
-        # Map id -> display string like "Name (#10)"
-        id_to_display = {p["id"]: f"{p.get('nombre', 'Unknown')} (#{p.get('numero', '')})" for p in jugadores}
 
         if not jugadores:
             st.info("No players registered yet. Add players in the 'Players' section.")
             st.stop()
 
+        version = data.get("version", 0)
+        por_posicion, id_to_display, nombres = indice_posiciones(torneo_slug, version, jugadores)
+
         # Check if predictor already has a saved team
-        existing = next((t for t in data.get("teams", []) if t.get("predictor") == predictor), None)
+        existing_idx = indice_teams(torneo_slug, version, data.get("teams", [])).get(predictor)
+        existing = data["teams"][existing_idx] if existing_idx is not None else None
 
-        positions = ["GK", "CB", "CM", "ST", "LW/RW"]
+        positions = POSICIONES_EQUIPO
 
         # Prefill session_state for selectboxes if existing
         if existing:
@@ -298,13 +1209,20 @@ elif opcion == "Make your team":
                 val = existing.get("seleccion", {}).get(pos, "")
                 st.session_state.setdefault(f"team_{pos}", val)
 
-        cols = st.columns(1)
+        def fmt(i):
+            return "-- choose --" if i == "" else id_to_display.get(i, str(i))
+
         selections = {}
         for pos in positions:
-            options = [""] + [p["id"] for p in jugadores]
-            def fmt(i, id_to_display=id_to_display):
-                return "-- choose --" if i == "" else id_to_display.get(i, str(i))
-            sel = st.selectbox(f"{pos}", options=options, format_func=fmt, key=f"team_{pos}")
+            # Drop picks of players that no longer exist
+            if st.session_state.get(f"team_{pos}", "") not in id_to_display:
+                st.session_state[f"team_{pos}"] = ""
+            col1, col2 = st.columns([1, 2])
+            with col1:
+                texto = st.text_input(f"🔍 Search {pos}", key=f"buscar_{pos}", placeholder="Type a name...")
+            options = filtrar_opciones(por_posicion[pos], nombres, texto, st.session_state[f"team_{pos}"])
+            with col2:
+                sel = st.selectbox(f"{pos}", options=options, format_func=fmt, key=f"team_{pos}")
             selections[pos] = sel
 
         if st.button("Submit Team", type="primary"):
@@ -314,14 +1232,18 @@ elif opcion == "Make your team":
             elif len(set(sel_ids)) < len(sel_ids):
                 st.error("A player cannot be selected for multiple positions")
             else:
-                # remove any previous team for predictor
-                data["teams"] = [t for t in data.get("teams", []) if t.get("predictor") != predictor]
-                data["teams"].append({
+                nuevo = {
                     "predictor": predictor,
                     "seleccion": selections,
                     "timestamp": datetime.now().isoformat()
-                })
-                save_data(data)
+                }
+                # Replace any previous team for predictor in place
+                if existing_idx is not None:
+                    data["teams"][existing_idx] = nuevo
+                else:
+                    data["teams"].append(nuevo)
+                save_data(data, archivo_torneo)
+                indice.actualizar(data)
                 st.success("✅ Team saved")
                 st.rerun()
 
@@ -433,19 +1355,19 @@ elif opcion == "📋 Match History":
     if not data["partidos"]:
         st.info("📝 No matches registered yet. Register the first one!")
     else:
-        partidos_ordenados = sorted(data["partidos"], key=lambda x: x["fecha"], reverse=True)
+        partidos = data["partidos"]
         
         # Filter only played matches
-        partidos_jugados = [p for p in partidos_ordenados if p.get("estado", "played") == "played" and p["goles1"] is not None and p["goles2"] is not None]
+        partidos_jugados = partidos.jugados(partidos.por_fecha(reverse=True))
         
         if not partidos_jugados:
             st.info("📝 No matches played yet.")
         else:
-            for idx, partido in enumerate(partidos_jugados, 1):
-                equipo1_nombre = obtener_nombre_equipo(data, partido["equipo1_id"])
-                equipo2_nombre = obtener_nombre_equipo(data, partido["equipo2_id"])
-                goles1 = partido["goles1"]
-                goles2 = partido["goles2"]
+            for idx, fila in enumerate(partidos_jugados, 1):
+                equipo1_nombre = obtener_nombre_equipo(data, partidos.equipo1[fila])
+                equipo2_nombre = obtener_nombre_equipo(data, partidos.equipo2[fila])
+                goles1 = partidos.goles1[fila]
+                goles2 = partidos.goles2[fila]
                 
                 if goles1 > goles2:
                     emoji_resultado = "🥅"
@@ -458,7 +1380,7 @@ elif opcion == "📋 Match History":
                 
                 with col1:
                     st.markdown(f"**{idx}.** {equipo1_nombre} **{goles1} - {goles2}** {equipo2_nombre}")
-                    st.caption(f"📅 {partido['fecha']}")
+                    st.caption(f"📅 {partidos.fechas[fila]}")
                 
                 with col2:
                     st.markdown(f"<p style='text-align: center; font-size: 1.5rem;'>{emoji_resultado}</p>", unsafe_allow_html=True)
@@ -474,21 +1396,15 @@ elif opcion == "📅 Fixtures":
     else:
         from datetime import datetime as dt
         
-        # Ensure all matches have an ID
-        for idx, partido in enumerate(data["partidos"]):
-            if "id" not in partido:
-                partido["id"] = idx + 1
-        save_data(data)
-        
-        partidos_ordenados = sorted(data["partidos"], key=lambda x: x["fecha"])
+        partidos = data["partidos"]
         
-        # Group by date
+        # Group rows by date
         fechas_dict = {}
-        for partido in partidos_ordenados:
-            fecha = partido["fecha"]
+        for fila in partidos.por_fecha():
+            fecha = partidos.fechas[fila]
             if fecha not in fechas_dict:
                 fechas_dict[fecha] = []
-            fechas_dict[fecha].append(partido)
+            fechas_dict[fecha].append(fila)
         
         # Display calendar
         for fecha in sorted(fechas_dict.keys()):
@@ -500,13 +1416,11 @@ elif opcion == "📅 Fixtures":
             
             st.subheader(f"📅 {fecha_formateada}")
             
-            for partido in fechas_dict[fecha]:
-                partido_id = partido.get("id", 0)
-                equipo1_id = partido["equipo1_id"]
-                equipo2_id = partido["equipo2_id"]
-                goles1 = partido["goles1"]
-                goles2 = partido["goles2"]
-                estado = partido.get("estado", "played")
+            for fila in fechas_dict[fecha]:
+                equipo1_id = partidos.equipo1[fila]
+                equipo2_id = partidos.equipo2[fila]
+                goles1 = partidos.goles1[fila]
+                goles2 = partidos.goles2[fila]
                 
                 equipo1_nombre = obtener_nombre_equipo(data, equipo1_id)
                 equipo2_nombre = obtener_nombre_equipo(data, equipo2_id)
@@ -515,7 +1429,7 @@ elif opcion == "📅 Fixtures":
                 equipo2_emoji = next((e["escudo"] for e in data["equipos"] if e["id"] == equipo2_id), "⚽")
                 
                 # Determine result
-                if estado == "pending" or goles1 is None or goles2 is None:
+                if not partidos.jugado(fila):
                     resultado = "⏳ Pending"
                     score_display = "? - ?"
                 elif goles1 > goles2:
@@ -551,8 +1465,8 @@ elif opcion == "📅 Fixtures":
         resumen = []
         for fecha in sorted(fechas_dict.keys()):
             partidos_fecha = fechas_dict[fecha]
-            partidos_jugados_fecha = [p for p in partidos_fecha if p.get("estado", "played") == "played" and p["goles1"] is not None and p["goles2"] is not None]
-            total_goles = sum(p["goles1"] + p["goles2"] for p in partidos_jugados_fecha) if partidos_jugados_fecha else 0
+            partidos_jugados_fecha = partidos.jugados(partidos_fecha)
+            total_goles = sum(partidos.goles1[i] + partidos.goles2[i] for i in partidos_jugados_fecha)
             avg_goles = round(total_goles / len(partidos_jugados_fecha), 1) if partidos_jugados_fecha else 0
             
             resumen.append({
@@ -570,9 +1484,6 @@ elif opcion == "📅 Fixtures":
 elif opcion == "� Comments & Suggestions":
     st.header("💬 COMMENTS AND SUGGESTIONS")
     
-    if "comments" not in data:
-        data["comments"] = []
-    
     # Display existing comments
     st.subheader("📝 All Comments and Suggestions")
     
@@ -599,12 +1510,15 @@ elif opcion == "� Comments & Suggestions":
             if not name.strip() or not message.strip():
                 st.error("❌ Name and message cannot be empty.")
             else:
-                data["comments"].append({
+                nuevo_comentario = {
+                    "id": data["comments"][-1]["id"] + 1 if data["comments"] else 1,
                     "name": name.strip(),
                     "message": message.strip(),
                     "timestamp": datetime.now().isoformat()
-                })
-                save_data(data)
+                }
+                data["comments"].append(nuevo_comentario)
+                save_data(data, archivo_torneo)
+                indice.actualizar(data, "comentario", nuevo_comentario)
                 st.success("✅ Thank you! Your comment has been submitted successfully.")
 
 elif opcion == "�🔐 Admin":
@@ -626,14 +1540,15 @@ elif opcion == "�🔐 Admin":
             if st.button("🚪 Logout Admin", use_container_width=True):
                 st.session_state.admin_password_entered = False
                 data["admin_session"] = None
-                save_data(data)
+                save_data(data, archivo_torneo)
+                indice.actualizar(data)
                 st.success("✅ Admin session closed")
                 st.rerun()
         
         st.markdown("---")
         
         # Admin tabs
-        admin_tab1, admin_tab2, admin_tab3 = st.tabs(["⚽ Edit Matches", "📣 Submitted Teams", "💬 Comments & Suggestions"])
+        admin_tab1, admin_tab2, admin_tab3, admin_tab4, admin_tab5, admin_tab6 = st.tabs(["⚽ Edit Matches", "📣 Submitted Teams", "💬 Comments & Suggestions", "🗂️ Tournaments", "💾 Backups", "🏟️ Format"])
         
         with admin_tab1:
             st.subheader("⚽ MANAGE MATCH RESULTS")
@@ -644,36 +1559,48 @@ elif opcion == "�🔐 Admin":
                 # Display all matches for editing
                 st.write("**Click on a match to edit its result:**")
                 
-                for idx, partido in enumerate(data.get("partidos", [])):
+                partidos = data["partidos"]
+                for idx in range(len(partidos)):
                     col1, col2, col3, col4, col5 = st.columns([2, 1, 2, 2, 1])
                     
-                    equipo1_nombre = obtener_nombre_equipo(data, partido["equipo1_id"])
-                    equipo2_nombre = obtener_nombre_equipo(data, partido["equipo2_id"])
-                    equipo1_emoji = next((e["escudo"] for e in data["equipos"] if e["id"] == partido["equipo1_id"]), "⚽")
-                    equipo2_emoji = next((e["escudo"] for e in data["equipos"] if e["id"] == partido["equipo2_id"]), "⚽")
+                    equipo1_nombre = obtener_nombre_equipo(data, partidos.equipo1[idx])
+                    equipo2_nombre = obtener_nombre_equipo(data, partidos.equipo2[idx])
+                    equipo1_emoji = next((e["escudo"] for e in data["equipos"] if e["id"] == partidos.equipo1[idx]), "⚽")
+                    equipo2_emoji = next((e["escudo"] for e in data["equipos"] if e["id"] == partidos.equipo2[idx]), "⚽")
                     
                     with col1:
                         st.write(f"**{equipo1_emoji} {equipo1_nombre}**")
                     
                     with col2:
-                        goles1 = st.number_input(f"Goles", value=partido["goles1"] if partido["goles1"] is not None else 0, key=f"goles1_{idx}", min_value=0, step=1)
+                        goles1 = st.number_input(f"Goles", value=max(partidos.goles1[idx], 0), key=f"goles1_{idx}", min_value=0, step=1)
                     
                     with col3:
                         st.write(f"**{equipo2_emoji} {equipo2_nombre}**")
                     
                     with col4:
-                        goles2 = st.number_input(f"Goles ", value=partido["goles2"] if partido["goles2"] is not None else 0, key=f"goles2_{idx}", min_value=0, step=1)
+                        goles2 = st.number_input(f"Goles ", value=max(partidos.goles2[idx], 0), key=f"goles2_{idx}", min_value=0, step=1)
                     
                     with col5:
                         if st.button("💾", key=f"save_{idx}", use_container_width=True):
-                            data["partidos"][idx]["goles1"] = goles1
-                            data["partidos"][idx]["goles2"] = goles2
-                            data["partidos"][idx]["estado"] = "played"
-                            save_data(data)
-                            st.success(f"✅ Match updated: {goles1} - {goles2}")
-                            st.rerun()
+                            formato = data.get("formato") or {}
+                            eliminatoria = formato.get("eliminatoria", [])
+                            fase_actual = partidos.fases[idx] is not None and partidos.fases[idx] == formato.get("creado")
+                            if fase_actual and partidos.grupos[idx] is not None and eliminatoria:
+                                st.error("❌ The group stage is closed: the bracket has already been drawn")
+                            elif fase_actual and partidos.rondas[idx] and partidos.rondas[idx] < len(eliminatoria):
+                                st.error("❌ This result already decided the next round")
+                            elif partidos.rondas[idx] and goles1 == goles2:
+                                st.error("❌ Knockout matches need a winner")
+                            else:
+                                partidos.registrar_resultado(idx, goles1, goles2)
+                                nuevas = cambio_en_partido(data, idx)
+                                save_data(data, archivo_torneo)
+                                indice.actualizar(data, "partido", idx, *nuevas)
+                                st.success(f"✅ Match updated: {goles1} - {goles2}")
+                                st.rerun()
                     
-                    st.caption(f"📅 {partido['fecha']}")
+                    fase = etiqueta_fase(data, idx)
+                    st.caption(f"📅 {partidos.fechas[idx]}{f' · {fase}' if fase else ''}")
                     st.divider()
             
             st.markdown("---")
@@ -712,15 +1639,9 @@ elif opcion == "�🔐 Admin":
                 elif fecha_new is None:
                     st.error("❌ Please select a date")
                 else:
-                    data["partidos"].append({
-                        "equipo1_id": equipo1_new,
-                        "equipo2_id": equipo2_new,
-                        "goles1": goles1_new,
-                        "goles2": goles2_new,
-                        "fecha": str(fecha_new),
-                        "estado": "played"
-                    })
-                    save_data(data)
+                    fila = data["partidos"].agregar(equipo1_new, equipo2_new, goles1_new, goles2_new, str(fecha_new))
+                    save_data(data, archivo_torneo)
+                    indice.actualizar(data, "partido", fila)
                     st.success(f"✅ Match added: {obtener_nombre_equipo(data, equipo1_new)} {goles1_new} - {goles2_new} {obtener_nombre_equipo(data, equipo2_new)}")
                     st.rerun()
         
@@ -750,9 +1671,6 @@ elif opcion == "�🔐 Admin":
             st.subheader("💬 Comments and Suggestions")
             st.info("📌 Users submit comments through the 'Comments & Suggestions' menu option. Manage them here.")
 
-            if "comments" not in data:
-                data["comments"] = []
-
             # Display existing comments with delete option
             if not data["comments"]:
                 st.info("No comments or suggestions yet.")
@@ -769,24 +1687,166 @@ elif opcion == "�🔐 Admin":
                     with col2:
                         if st.button("🗑️", key=f"delete_comment_{idx}", help="Delete comment"):
                             data["comments"].pop(idx)
-                            save_data(data)
+                            save_data(data, archivo_torneo)
+                            indice.actualizar(data, "comentario", id_eliminado=comment["id"])
                             st.success("✅ Comment deleted")
                             st.rerun()
                     st.divider()
+
+        with admin_tab4:
+            st.subheader("➕ New Tournament")
+            nombre_torneo = st.text_input("Tournament Name", placeholder="e.g. Year 9 Football Tournament 2026", key="nuevo_torneo_nombre")
+            copiar_equipos = st.checkbox("Copy teams from this tournament", value=True, key="nuevo_torneo_equipos")
+
+            if st.button("✅ Create Tournament", type="primary"):
+                if not nombre_torneo.strip():
+                    st.error("❌ Tournament name cannot be empty")
+                else:
+                    slug = nuevo_slug(registro, nombre_torneo.strip())
+                    archivo = os.path.join(TORNEOS_DIR, f"{slug}.json")
+                    os.makedirs(TORNEOS_DIR, exist_ok=True)
+                    escribir_json(archivo, {
+                        "equipos": [dict(e) for e in data["equipos"]] if copiar_equipos else [],
+                        "jugadores": [],
+                        "partidos": [],
+                        "teams": [],
+                        "comments": [],
+                        "admin_session": None
+                    })
+                    registro["torneos"].append({"slug": slug, "nombre": nombre_torneo.strip(), "archivo": archivo, "archivado": False})
+                    save_torneos(registro)
+                    # The selector widget already ran this rerun; switch on the next one
+                    st.session_state.torneo_pendiente = slug
+                    st.success(f"✅ Tournament {nombre_torneo.strip()} created")
+                    st.rerun()
+
+            st.markdown("---")
+            st.subheader("🗄️ Archive This Season")
+            st.info("📌 Archiving compresses this tournament into a read-only file with its final standings. It can no longer be edited.")
+            confirmar = st.checkbox(f"I want to archive {torneo['nombre']}", key="confirmar_archivo")
+
+            if st.button("🗄️ Archive Tournament", disabled=not confirmar):
+                if sum(1 for t in registro["torneos"] if not t["archivado"]) <= 1:
+                    st.error("❌ Create another tournament before archiving the only live one")
+                else:
+                    try:
+                        archivar_torneo(registro, torneo, data)
+                    except (OSError, ValueError) as e:
+                        st.error(f"❌ Could not archive the tournament: {e}")
+                    else:
+                        st.session_state.admin_password_entered = False
+                        st.success(f"✅ {torneo['nombre']} archived")
+                        st.rerun()
+
+        with admin_tab5:
+            st.subheader("💾 Backups")
+            st.info(f"📌 A snapshot is saved every {BACKUP_CADA} changes or {BACKUP_INTERVALO // 60} minutes. Only the latest {MAX_CADENAS_BACKUP} full snapshots and the changes after them are kept.")
+            backups = obtener_backups(archivo_torneo)
+            if backups.error:
+                st.error(f"❌ The last snapshot failed ({backups.error[0]:%Y-%m-%d %H:%M:%S}): {backups.error[1]}")
+
+            if st.button("📸 Take Snapshot Now"):
+                backups.registrar(data, forzar=True)
+                st.success("✅ Snapshot queued")
+
+            snapshots = backups.listar()
+            if not snapshots:
+                st.info("No snapshots yet.")
+            else:
+                por_numero = {numero: (marca, completo) for numero, marca, completo in snapshots}
+                numero_backup = st.selectbox(
+                    "Snapshot",
+                    options=[numero for numero, _, _ in reversed(snapshots)],
+                    format_func=lambda x: f"#{x} · {por_numero[x][0]:%Y-%m-%d %H:%M:%S} · {'full' if por_numero[x][1] else 'changes'}",
+                    key="backup_numero"
+                )
+                confirmar_backup = st.checkbox("I understand that current data will be replaced", key="confirmar_backup")
+
+                if st.button("⏪ Restore Snapshot", type="primary", disabled=not confirmar_backup):
+                    try:
+                        restaurada = preparar_data(backups.restaurar(numero_backup))
+                    except (OSError, ValueError) as e:
+                        st.error(f"❌ Could not restore snapshot #{numero_backup}: {e}")
+                    else:
+                        restaurada["version"] = data.get("version", 0)
+                        # Keep the current admin logged in
+                        restaurada["admin_session"] = data.get("admin_session")
+                        save_data(restaurada, archivo_torneo)
+                        # The search index rebuilds on the next rerun
+                        st.success(f"✅ Data restored to snapshot #{numero_backup}")
+                        st.rerun()
+
+        with admin_tab6:
+            st.subheader("🏟️ Tournament Format")
+            formato = data.get("formato")
+
+            if formato:
+                st.info(f"📌 Group stage with {len(formato['grupos'])} groups. The top {formato['clasifican']} of each group advance to the knockout stage.")
+                confirmar_liga = st.checkbox("I want to go back to a single league table", key="confirmar_liga")
+
+                if st.button("🗑️ Remove Groups", disabled=not confirmar_liga):
+                    # Matches stay; they just count in the single league table again
+                    del data["formato"]
+                    save_data(data, archivo_torneo)
+                    indice.actualizar(data)
+                    st.success("✅ Back to a single league")
+                    st.rerun()
+            else:
+                st.write("Split the teams into groups. Each group plays a round-robin, then the best teams play a knockout bracket.")
+                equipo_ids = [e["id"] for e in data["equipos"]]
+
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    num_grupos = st.number_input("Number of groups", min_value=1, max_value=max(len(equipo_ids) // 2, 1), value=min(2, max(len(equipo_ids) // 2, 1)), step=1, key="num_grupos")
+                with col2:
+                    clasifican = st.number_input("Teams advancing per group", min_value=1, value=2, step=1, key="clasifican")
+                with col3:
+                    inicio = st.date_input("First matchday", value=None, key="inicio_grupos")
+
+                grupos = {}
+                for n in range(num_grupos):
+                    grupo = nombre_grupo(n)
+                    grupos[grupo] = st.multiselect(
+                        f"Group {grupo}",
+                        options=equipo_ids,
+                        default=equipo_ids[n::num_grupos],
+                        format_func=lambda x: obtener_nombre_equipo(data, x),
+                        key=f"grupo_{grupo}_{num_grupos}"
+                    )
+
+                if st.button("✅ Create Group Stage", type="primary"):
+                    asignados = [e for ids in grupos.values() for e in ids]
+                    if any(len(ids) < 2 for ids in grupos.values()):
+                        st.error("❌ Every group needs at least 2 teams")
+                    elif len(set(asignados)) < len(asignados):
+                        st.error("❌ A team cannot be in more than one group")
+                    elif clasifican > min(len(ids) for ids in grupos.values()):
+                        st.error("❌ More teams advance than some group has")
+                    elif clasifican * num_grupos < 2:
+                        st.error("❌ At least 2 teams must advance to the knockout stage")
+                    elif inicio is None:
+                        st.error("❌ Please select a date")
+                    else:
+                        filas = crear_fase_grupos(data, grupos, clasifican, inicio)
+                        save_data(data, archivo_torneo)
+                        indice.actualizar(data, "partido", *filas)
+                        st.success(f"✅ Group stage created with {len(filas)} matches")
+                        st.rerun()
     else:
         # No admin active - allow password entry
         st.warning("⚠️ This section requires administrator password")
         password_input = st.text_input("Enter admin password", type="password", placeholder="Enter password")
         
         if st.button("🔓 Unlock Admin Panel", use_container_width=True, type="primary"):
-            if password_input == "Sebas2014":
+            if password_input == ADMIN_PASSWORD:
                 st.session_state.admin_password_entered = True
                 data["admin_session"] = datetime.now().isoformat()
-                save_data(data)
+                save_data(data, archivo_torneo)
+                indice.actualizar(data)
                 st.success("✅ Admin panel unlocked!")
                 st.rerun()
             else:
                 st.error("❌ Incorrect password")
 
 st.markdown("---")
-st.markdown("<p style='text-align: center; color: #999; font-size: 0.8rem;'>⚽ Year 10 Football Tournament v1.0 - May the best team win! 🏆</p>", unsafe_allow_html=True)
+st.markdown(f"<p style='text-align: center; color: #999; font-size: 0.8rem;'>⚽ {torneo['nombre']} v1.0 - May the best team win! 🏆</p>", unsafe_allow_html=True)